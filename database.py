@@ -1,5 +1,8 @@
+import asyncio
 import aiosqlite
 import json
+import time
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 from datetime import datetime
 
@@ -7,18 +10,102 @@ import os
 
 DATABASE_PATH = Path(os.environ.get("NAS_SYNC_DB", "/config/nas_sync.db"))
 
+# One long-lived connection shared by every helper (opened in init_db). Reads
+# go straight through; writers take _write_lock so one helper's commit can't
+# sweep up another helper's half-finished statements.
+_db: aiosqlite.Connection | None = None
+_write_lock = asyncio.Lock()
+
+# The connection runs in autocommit mode (isolation_level=None) and _write()
+# issues its own BEGIN IMMEDIATE ... COMMIT, so a multi-statement helper is
+# exactly one transaction and takes the write lock up front.
+
+# Bumped after every committed write so the API can hand out ETags. Seeded
+# from the clock so a tag issued by a previous process never matches.
+_data_version = time.time_ns()
+
+# sqlite3 keeps compiled statements in a per-connection cache keyed by SQL
+# text, so on the shared connection the hot per-sync statements are prepared
+# once and re-bound on every later call. Keep their text in one place.
+STATEMENT_CACHE_SIZE = 256
+_SQL_SELECT_MAPPINGS = "SELECT * FROM folder_mappings ORDER BY name"
+_SQL_UPDATE_SYNC_STATUS = """
+    UPDATE folder_mappings
+    SET last_sync_at = ?, last_sync_status = ?, last_sync_message = ?
+    WHERE id = ?
+"""
+
+
+@asynccontextmanager
+async def _write():
+    """Run a write on the shared connection as one BEGIN IMMEDIATE transaction."""
+    global _data_version
+    async with _write_lock:
+        await _db.execute("BEGIN IMMEDIATE")
+        try:
+            yield _db
+            await _db.execute("COMMIT")
+        except BaseException:
+            # A failed COMMIT (disk full, I/O error) must not leave the shared
+            # connection inside the transaction. SQLite may have rolled back
+            # already, so a failing ROLLBACK mustn't mask the original error.
+            with suppress(Exception):
+                await _db.execute("ROLLBACK")
+            raise
+        _data_version += 1
+
+
+async def _fetch_dicts(sql: str, params=()):
+    """Run a query and return its rows as dicts.
+
+    Rows come back as plain tuples (no row_factory); the column names are
+    read from the cursor once per query and zipped onto each row.
+    """
+    async with _db.execute(sql, params) as cursor:
+        cols = [d[0] for d in cursor.description]
+        return [dict(zip(cols, row)) for row in await cursor.fetchall()]
+
+
+def get_data_version() -> int:
+    """Current write version of the database (changes on every commit)."""
+    return _data_version
+
 
 async def _ensure_column(db, table: str, column: str, decl: str):
-    """Add a column to an existing table if it's missing (simple migration)."""
+    """Add a column to an existing table if it's missing (simple migration).
+
+    Returns True if the column was added.
+    """
     async with db.execute(f"PRAGMA table_info({table})") as cursor:
         existing = [row[1] for row in await cursor.fetchall()]
     if column not in existing:
         await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+    return False
 
 
 async def init_db():
-    """Initialize the database with required tables."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    """Open the shared connection and initialize the required tables.
+
+    Returns the scheduler config, which startup needs next anyway.
+    """
+    global _db
+    if _db is None:
+        _db = await aiosqlite.connect(
+            DATABASE_PATH, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # WAL lets the UI's readers run alongside the sync writer, and with
+        # synchronous=NORMAL a commit is one sequential WAL append
+        await _db.execute("PRAGMA journal_mode=WAL")
+        await _db.execute("PRAGMA synchronous=NORMAL")
+        await _db.execute("PRAGMA temp_store=MEMORY")
+        await _db.execute("PRAGMA cache_size=-8000")
+        # Memory-map up to 256 MB so log scans read mapped pages, not pread()
+        await _db.execute("PRAGMA mmap_size=268435456")
+        # Bound the ANALYZE work PRAGMA optimize may do on a large sync_logs
+        await _db.execute("PRAGMA analysis_limit=1000")
+
+    async with _write() as db:
         # NAS configuration table
         await db.execute("""
             CREATE TABLE IF NOT EXISTS nas_config (
@@ -27,6 +114,10 @@ async def init_db():
                 ssh_user TEXT NOT NULL,
                 ssh_key_path TEXT DEFAULT '/config/id_rsa',
                 ssh_port INTEGER DEFAULT 22,
+                ssh_cipher TEXT DEFAULT 'aes128-gcm@openssh.com',
+                compress INTEGER DEFAULT 0,
+                max_parallel INTEGER DEFAULT 4,
+                online_check TEXT DEFAULT 'tcp',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
@@ -41,7 +132,7 @@ async def init_db():
                 destination_path TEXT NOT NULL,
                 enabled INTEGER DEFAULT 1,
                 delete_source INTEGER DEFAULT 0,
-                last_sync_at TIMESTAMP,
+                last_sync_at INTEGER,
                 last_sync_status TEXT,
                 last_sync_message TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -58,8 +149,9 @@ async def init_db():
                 files_transferred INTEGER DEFAULT 0,
                 bytes_transferred INTEGER DEFAULT 0,
                 duration_seconds REAL,
-                started_at TIMESTAMP,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at INTEGER,
+                completed_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                mapping_name TEXT,
                 FOREIGN KEY (mapping_id) REFERENCES folder_mappings(id) ON DELETE CASCADE
             )
         """)
@@ -171,148 +263,250 @@ async def init_db():
             INSERT OR IGNORE INTO cleanup_config (id, watch_folder) VALUES (1, '')
         """)
 
+        # Indexes: per-mapping log history, the recent-logs feed and the
+        # mapping list all read in index order and stop at LIMIT
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sync_logs_mapping_completed
+            ON sync_logs(mapping_id, completed_at DESC)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sync_logs_completed
+            ON sync_logs(completed_at DESC)
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_folder_mappings_name
+            ON folder_mappings(name)
+        """)
+
         # Migrations: schedule mode support for existing installs
         await _ensure_column(db, "scheduler_config", "schedule_mode", "TEXT DEFAULT 'interval'")
         await _ensure_column(db, "scheduler_config", "daily_time", "TEXT DEFAULT '03:00'")
         await _ensure_column(db, "f1_config", "schedule_mode", "TEXT DEFAULT 'interval'")
         await _ensure_column(db, "f1_config", "daily_time", "TEXT DEFAULT '03:00'")
 
-        await db.commit()
+        # Migration: transfer tuning for the rsync ssh transport. Existing
+        # installs keep ssh's default cipher until one is picked in settings,
+        # since not every NAS sshd offers AES-GCM.
+        await _ensure_column(db, "nas_config", "ssh_cipher", "TEXT DEFAULT ''")
+        await _ensure_column(db, "nas_config", "compress", "INTEGER DEFAULT 0")
+        await _ensure_column(db, "nas_config", "max_parallel", "INTEGER DEFAULT 4")
+        await _ensure_column(db, "nas_config", "online_check", "TEXT DEFAULT 'tcp'")
 
+        # Migration: sync timestamps used to be ISO-8601 TEXT. Existing
+        # columns keep their old DEFAULT, so writers always pass the value.
+        await db.execute("""
+            UPDATE sync_logs
+            SET started_at = CAST(strftime('%s', started_at) AS INTEGER)
+            WHERE typeof(started_at) = 'text'
+        """)
+        await db.execute("""
+            UPDATE sync_logs
+            SET completed_at = CAST(strftime('%s', completed_at) AS INTEGER)
+            WHERE typeof(completed_at) = 'text'
+        """)
+        await db.execute("""
+            UPDATE folder_mappings
+            SET last_sync_at = CAST(strftime('%s', last_sync_at) AS INTEGER)
+            WHERE typeof(last_sync_at) = 'text'
+        """)
+
+        # Migration: logs carry their mapping's name so the log feed needs no join
+        if await _ensure_column(db, "sync_logs", "mapping_name", "TEXT"):
+            await db.execute("""
+                UPDATE sync_logs
+                SET mapping_name = (SELECT name FROM folder_mappings WHERE id = sync_logs.mapping_id)
+            """)
+
+    # Refresh planner stats for indexes whose tables have grown since last run
+    await _db.execute("PRAGMA optimize")
+
+    return await get_scheduler_config()
 
-# NAS Config functions
-async def get_nas_config():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM nas_config WHERE id = 1") as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
 
+async def close_db():
+    """Close the shared connection (application shutdown)."""
+    global _db
+    if _db is not None:
+        await _db.execute("PRAGMA optimize")
+        await _db.close()
+        _db = None
 
-async def save_nas_config(hostname: str, ssh_user: str, ssh_key_path: str = "/config/id_rsa", ssh_port: int = 22):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+
+# Single-row configs the UI polls are served from a short-lived cache;
+# saving a config drops its entry. Entries are (value, expires_at).
+CONFIG_CACHE_TTL = 5
+_nas_config_cache = (None, 0.0)
+_scheduler_config_cache = (None, 0.0)
+
+
+# NAS Config functions
+async def get_nas_config():
+    rows = await _fetch_dicts("SELECT * FROM nas_config WHERE id = 1")
+    return rows[0] if rows else None
+
+
+async def get_nas_config_cached(ttl: float = CONFIG_CACHE_TTL):
+    """get_nas_config(), reusing the last result for up to ttl seconds."""
+    global _nas_config_cache
+    config, expires_at = _nas_config_cache
+    now = time.monotonic()
+    if now >= expires_at:
+        config = await get_nas_config()
+        _nas_config_cache = (config, now + ttl)
+    return dict(config) if config else None
+
+
+async def save_nas_config(hostname: str, ssh_user: str, ssh_key_path: str = "/config/id_rsa", ssh_port: int = 22,
+                          ssh_cipher: str = "aes128-gcm@openssh.com", compress: bool = False,
+                          max_parallel: int = 4, online_check: str = "tcp"):
+    global _nas_config_cache
+    async with _write() as db:
         await db.execute("""
-            INSERT INTO nas_config (id, hostname, ssh_user, ssh_key_path, ssh_port, updated_at)
-            VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            INSERT INTO nas_config (id, hostname, ssh_user, ssh_key_path, ssh_port,
+                                    ssh_cipher, compress, max_parallel, online_check, updated_at)
+            VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(id) DO UPDATE SET
                 hostname = excluded.hostname,
                 ssh_user = excluded.ssh_user,
                 ssh_key_path = excluded.ssh_key_path,
                 ssh_port = excluded.ssh_port,
+                ssh_cipher = excluded.ssh_cipher,
+                compress = excluded.compress,
+                max_parallel = excluded.max_parallel,
+                online_check = excluded.online_check,
                 updated_at = CURRENT_TIMESTAMP
-        """, (hostname, ssh_user, ssh_key_path, ssh_port))
-        await db.commit()
+        """, (hostname, ssh_user, ssh_key_path, ssh_port, ssh_cipher, int(compress),
+              max_parallel, online_check))
+    _nas_config_cache = (None, 0.0)
 
 
 # Folder mapping functions
 async def get_folder_mappings():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM folder_mappings ORDER BY name") as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+    rows = await _fetch_dicts(_SQL_SELECT_MAPPINGS)
+    return rows
 
 
 async def get_folder_mapping(mapping_id: int):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM folder_mappings WHERE id = ?", (mapping_id,)) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+    rows = await _fetch_dicts("SELECT * FROM folder_mappings WHERE id = ?", (mapping_id,))
+    return rows[0] if rows else None
 
 
 async def create_folder_mapping(name: str, source_path: str, destination_path: str, delete_source: bool = False):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         cursor = await db.execute("""
             INSERT INTO folder_mappings (name, source_path, destination_path, delete_source)
             VALUES (?, ?, ?, ?)
         """, (name, source_path, destination_path, int(delete_source)))
-        await db.commit()
         return cursor.lastrowid
 
 
 async def update_folder_mapping(mapping_id: int, name: str, source_path: str, destination_path: str, 
                                  enabled: bool, delete_source: bool):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
+    """Update a mapping; returns the number of rows matched (0 if it doesn't exist)."""
+    async with _write() as db:
+        cursor = await db.execute("""
             UPDATE folder_mappings 
             SET name = ?, source_path = ?, destination_path = ?, enabled = ?, delete_source = ?
             WHERE id = ?
         """, (name, source_path, destination_path, int(enabled), int(delete_source), mapping_id))
-        await db.commit()
+        if cursor.rowcount:
+            # Keep the name denormalized into sync_logs in step with a rename
+            await db.execute("""
+                UPDATE sync_logs SET mapping_name = ?
+                WHERE mapping_id = ? AND mapping_name IS NOT ?
+            """, (name, mapping_id, name))
+        return cursor.rowcount
 
 
 async def delete_folder_mapping(mapping_id: int):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM folder_mappings WHERE id = ?", (mapping_id,))
-        await db.commit()
-
-
-async def update_mapping_sync_status(mapping_id: int, status: str, message: str = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            UPDATE folder_mappings 
-            SET last_sync_at = CURRENT_TIMESTAMP, last_sync_status = ?, last_sync_message = ?
-            WHERE id = ?
-        """, (status, message, mapping_id))
-        await db.commit()
+    """Delete a mapping; returns the number of rows deleted."""
+    async with _write() as db:
+        cursor = await db.execute("DELETE FROM folder_mappings WHERE id = ?", (mapping_id,))
+        return cursor.rowcount
 
 
 # Sync log functions
-async def create_sync_log(mapping_id: int, status: str, message: str = None, 
-                          files_transferred: int = 0, bytes_transferred: int = 0,
-                          duration_seconds: float = None, started_at: str = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            INSERT INTO sync_logs (mapping_id, status, message, files_transferred, 
-                                   bytes_transferred, duration_seconds, started_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (mapping_id, status, message, files_transferred, bytes_transferred, duration_seconds, started_at))
-        await db.commit()
+# 9 columns x 110 rows stays under SQLite's historic 999 bound-parameter limit
+SYNC_LOG_BATCH_ROWS = 110
+
+
+async def record_sync_results(statuses: list, logs: list):
+    """Write a sync run's mapping statuses and log rows in one transaction.
+
+    Each status is (synced_at, status, message, mapping_id); each log row is
+    (mapping_id, status, message, files_transferred, bytes_transferred,
+    duration_seconds, started_at, completed_at, mapping_name). Timestamps
+    are epoch seconds. Log rows go in as multi-row VALUES inserts.
+    """
+    if not statuses and not logs:
+        return
+    async with _write() as db:
+        if statuses:
+            await db.executemany(_SQL_UPDATE_SYNC_STATUS, statuses)
+        for i in range(0, len(logs), SYNC_LOG_BATCH_ROWS):
+            chunk = logs[i:i + SYNC_LOG_BATCH_ROWS]
+            placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))
+            await db.execute(f"""
+                INSERT INTO sync_logs (mapping_id, status, message, files_transferred,
+                                       bytes_transferred, duration_seconds, started_at,
+                                       completed_at, mapping_name)
+                VALUES {placeholders}
+            """, [value for row in chunk for value in row])
+
+
+async def iter_recent_sync_logs(limit: int = 50):
+    """Yield the most recent sync logs one row at a time."""
+    async with _db.execute("""
+        SELECT * FROM sync_logs
+        ORDER BY completed_at DESC
+        LIMIT ?
+    """, (limit,)) as cursor:
+        # aiosqlite fetches arraysize rows per thread hop while iterating
+        cursor.arraysize = 64
+        cols = [d[0] for d in cursor.description]
+        async for row in cursor:
+            yield dict(zip(cols, row))
 
 
 async def get_recent_sync_logs(limit: int = 50):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT sl.*, fm.name as mapping_name 
-            FROM sync_logs sl
-            LEFT JOIN folder_mappings fm ON sl.mapping_id = fm.id
-            ORDER BY sl.completed_at DESC
-            LIMIT ?
-        """, (limit,)) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+    return [row async for row in iter_recent_sync_logs(limit)]
 
 
 async def get_mapping_sync_logs(mapping_id: int, limit: int = 20):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("""
-            SELECT * FROM sync_logs 
-            WHERE mapping_id = ?
-            ORDER BY completed_at DESC
-            LIMIT ?
-        """, (mapping_id, limit)) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+    rows = await _fetch_dicts("""
+        SELECT * FROM sync_logs 
+        WHERE mapping_id = ?
+        ORDER BY completed_at DESC
+        LIMIT ?
+    """, (mapping_id, limit))
+    return rows
 
 
 # Scheduler config functions
 async def get_scheduler_config():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM scheduler_config WHERE id = 1") as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else {
-                "enabled": True, "interval_minutes": 15,
-                "schedule_mode": "interval", "daily_time": "03:00"
-            }
+    rows = await _fetch_dicts("SELECT * FROM scheduler_config WHERE id = 1")
+    return rows[0] if rows else {
+        "enabled": True, "interval_minutes": 15,
+        "schedule_mode": "interval", "daily_time": "03:00"
+    }
+
+
+async def get_scheduler_config_cached(ttl: float = CONFIG_CACHE_TTL):
+    """get_scheduler_config(), reusing the last result for up to ttl seconds."""
+    global _scheduler_config_cache
+    config, expires_at = _scheduler_config_cache
+    now = time.monotonic()
+    if now >= expires_at:
+        config = await get_scheduler_config()
+        _scheduler_config_cache = (config, now + ttl)
+    return dict(config)
 
 
 async def save_scheduler_config(enabled: bool, interval_minutes: int,
                                 schedule_mode: str = "interval", daily_time: str = "03:00"):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    """Save the scheduler config and return it as get_scheduler_config() would."""
+    global _scheduler_config_cache
+    async with _write() as db:
         await db.execute("""
             INSERT INTO scheduler_config (id, enabled, interval_minutes, schedule_mode, daily_time, updated_at)
             VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
@@ -323,66 +517,71 @@ async def save_scheduler_config(enabled: bool, interval_minutes: int,
                 daily_time = excluded.daily_time,
                 updated_at = CURRENT_TIMESTAMP
         """, (int(enabled), interval_minutes, schedule_mode, daily_time))
-        await db.commit()
+    _scheduler_config_cache = (None, 0.0)
+    return {
+        "enabled": int(enabled), "interval_minutes": interval_minutes,
+        "schedule_mode": schedule_mode, "daily_time": daily_time
+    }
 
 
 # Post-sync actions functions
-async def get_post_sync_actions():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM post_sync_actions ORDER BY name") as cursor:
-            rows = await cursor.fetchall()
-            result = []
-            for row in rows:
-                row_dict = dict(row)
-                row_dict['config'] = json.loads(row_dict['config'])
-                result.append(row_dict)
-            return result
+async def get_post_sync_actions(enabled_only: bool = False):
+    """List post-sync actions with their config decoded.
+
+    enabled_only filters in SQL, so the sync path never decodes the config of
+    actions it would skip anyway.
+    """
+    if enabled_only:
+        query = "SELECT * FROM post_sync_actions WHERE enabled = 1 ORDER BY name"
+    else:
+        query = "SELECT * FROM post_sync_actions ORDER BY name"
+    rows = await _fetch_dicts(query)
+    for row in rows:
+        row['config'] = json.loads(row['config'])
+    return rows
 
 
 async def create_post_sync_action(name: str, action_type: str, config: dict):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         cursor = await db.execute("""
             INSERT INTO post_sync_actions (name, action_type, config)
             VALUES (?, ?, ?)
         """, (name, action_type, json.dumps(config)))
-        await db.commit()
         return cursor.lastrowid
 
 
 async def update_post_sync_action(action_id: int, name: str, action_type: str, config: dict, enabled: bool):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
+    """Update an action; returns the number of rows matched (0 if it doesn't exist)."""
+    async with _write() as db:
+        cursor = await db.execute("""
             UPDATE post_sync_actions 
             SET name = ?, action_type = ?, config = ?, enabled = ?
             WHERE id = ?
         """, (name, action_type, json.dumps(config), int(enabled), action_id))
-        await db.commit()
+        return cursor.rowcount
 
 
 async def delete_post_sync_action(action_id: int):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM post_sync_actions WHERE id = ?", (action_id,))
-        await db.commit()
+    """Delete an action; returns the number of rows deleted."""
+    async with _write() as db:
+        cursor = await db.execute("DELETE FROM post_sync_actions WHERE id = ?", (action_id,))
+        return cursor.rowcount
 
 
 # F1 Config functions
 async def get_f1_config():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM f1_config WHERE id = 1") as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else {
-                "watch_folder": "", "output_folder": "", "tvdb_api_key": "",
-                "enabled": 0, "scan_interval_minutes": 15,
-                "schedule_mode": "interval", "daily_time": "03:00"
-            }
+    rows = await _fetch_dicts("SELECT * FROM f1_config WHERE id = 1")
+    return rows[0] if rows else {
+        "watch_folder": "", "output_folder": "", "tvdb_api_key": "",
+        "enabled": 0, "scan_interval_minutes": 15,
+        "schedule_mode": "interval", "daily_time": "03:00"
+    }
 
 
 async def save_f1_config(watch_folder: str, output_folder: str, tvdb_api_key: str,
                          enabled: bool, scan_interval_minutes: int,
                          schedule_mode: str = "interval", daily_time: str = "03:00"):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         await db.execute("""
             INSERT INTO f1_config (id, watch_folder, output_folder, tvdb_api_key, enabled,
                                    scan_interval_minutes, schedule_mode, daily_time, updated_at)
@@ -398,32 +597,26 @@ async def save_f1_config(watch_folder: str, output_folder: str, tvdb_api_key: st
                 updated_at = CURRENT_TIMESTAMP
         """, (watch_folder, output_folder, tvdb_api_key, int(enabled),
               scan_interval_minutes, schedule_mode, daily_time))
-        await db.commit()
 
 
 # F1 Episode cache functions
 async def get_f1_episodes(season: int):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(
-            "SELECT * FROM f1_episodes WHERE season = ? ORDER BY episode_number",
-            (season,)
-        ) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+    rows = await _fetch_dicts(
+        "SELECT * FROM f1_episodes WHERE season = ? ORDER BY episode_number",
+        (season,)
+    )
+    return rows
 
 
 async def has_f1_season_cache(season: int) -> bool:
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        async with db.execute(
-            "SELECT COUNT(*) FROM f1_episodes WHERE season = ?", (season,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row[0] > 0
+    rows = await _db.execute_fetchall(
+        "SELECT COUNT(*) FROM f1_episodes WHERE season = ?", (season,)
+    )
+    return rows[0][0] > 0
 
 
 async def save_f1_episodes(season: int, episodes: list):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         # Clear existing cache for this season
         await db.execute("DELETE FROM f1_episodes WHERE season = ?", (season,))
         for ep in episodes:
@@ -431,23 +624,21 @@ async def save_f1_episodes(season: int, episodes: list):
                 INSERT INTO f1_episodes (season, episode_number, episode_name, air_date)
                 VALUES (?, ?, ?, ?)
             """, (season, ep['episode_number'], ep['episode_name'], ep.get('air_date')))
-        await db.commit()
 
 
 async def clear_f1_episode_cache(season: int = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         if season:
             await db.execute("DELETE FROM f1_episodes WHERE season = ?", (season,))
         else:
             await db.execute("DELETE FROM f1_episodes")
-        await db.commit()
 
 
 # F1 Activity log functions
 async def create_f1_activity_log(original_filename: str, new_filename: str = None,
                                   season: int = None, episode_number: int = None,
                                   status: str = "moved", message: str = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         await db.execute("""
             INSERT INTO f1_activity_log (original_filename, new_filename, season, episode_number, status, message)
             VALUES (?, ?, ?, ?, ?, ?)
@@ -455,26 +646,22 @@ async def create_f1_activity_log(original_filename: str, new_filename: str = Non
         await db.execute("""
             DELETE FROM f1_activity_log WHERE id NOT IN (SELECT id FROM f1_activity_log ORDER BY processed_at DESC LIMIT 200)
         """)
-        await db.commit()
 
 
 # Download cleanup config functions
 async def get_cleanup_config():
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM cleanup_config WHERE id = 1") as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else {
-                "watch_folder": "", "min_age_minutes": 60, "remove_junk": 0,
-                "enabled": 0, "schedule_mode": "hourly",
-                "interval_minutes": 60, "daily_time": "03:00"
-            }
+    rows = await _fetch_dicts("SELECT * FROM cleanup_config WHERE id = 1")
+    return rows[0] if rows else {
+        "watch_folder": "", "min_age_minutes": 60, "remove_junk": 0,
+        "enabled": 0, "schedule_mode": "hourly",
+        "interval_minutes": 60, "daily_time": "03:00"
+    }
 
 
 async def save_cleanup_config(watch_folder: str, min_age_minutes: int, remove_junk: bool,
                               enabled: bool, schedule_mode: str, interval_minutes: int,
                               daily_time: str):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         await db.execute("""
             INSERT INTO cleanup_config (id, watch_folder, min_age_minutes, remove_junk, enabled,
                                         schedule_mode, interval_minutes, daily_time, updated_at)
@@ -490,13 +677,12 @@ async def save_cleanup_config(watch_folder: str, min_age_minutes: int, remove_ju
                 updated_at = CURRENT_TIMESTAMP
         """, (watch_folder, min_age_minutes, int(remove_junk), int(enabled),
               schedule_mode, interval_minutes, daily_time))
-        await db.commit()
 
 
 async def create_cleanup_activity_log(job_folder: str, original_name: str, new_name: str = None,
                                       action: str = "renamed", message: str = None,
                                       dry_run: bool = False):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _write() as db:
         await db.execute("""
             INSERT INTO cleanup_activity_log (job_folder, original_name, new_name, action, message, dry_run)
             VALUES (?, ?, ?, ?, ?, ?)
@@ -505,37 +691,28 @@ async def create_cleanup_activity_log(job_folder: str, original_name: str, new_n
             DELETE FROM cleanup_activity_log
             WHERE id NOT IN (SELECT id FROM cleanup_activity_log ORDER BY processed_at DESC LIMIT 500)
         """)
-        await db.commit()
 
 
 async def get_cleanup_activity_log(limit: int = 50, action: str = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        if action:
-            query = "SELECT * FROM cleanup_activity_log WHERE action = ? ORDER BY processed_at DESC LIMIT ?"
-            params = (action, limit)
-        else:
-            query = "SELECT * FROM cleanup_activity_log ORDER BY processed_at DESC LIMIT ?"
-            params = (limit,)
-        async with db.execute(query, params) as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+    if action:
+        query = "SELECT * FROM cleanup_activity_log WHERE action = ? ORDER BY processed_at DESC LIMIT ?"
+        params = (action, limit)
+    else:
+        query = "SELECT * FROM cleanup_activity_log ORDER BY processed_at DESC LIMIT ?"
+        params = (limit,)
+    rows = await _fetch_dicts(query, params)
+    return rows
 
 
 async def get_f1_activity_log(limit: int = 50, status: str = None):
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        if status:
-            async with db.execute(
-                "SELECT * FROM f1_activity_log WHERE status = ? ORDER BY processed_at DESC LIMIT ?",
-                (status, limit)
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        else:
-            async with db.execute(
-                "SELECT * FROM f1_activity_log ORDER BY processed_at DESC LIMIT ?",
-                (limit,)
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+    if status:
+        rows = await _fetch_dicts(
+            "SELECT * FROM f1_activity_log WHERE status = ? ORDER BY processed_at DESC LIMIT ?",
+            (status, limit)
+        )
+    else:
+        rows = await _fetch_dicts(
+            "SELECT * FROM f1_activity_log ORDER BY processed_at DESC LIMIT ?",
+            (limit,)
+        )
+    return rows
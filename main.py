@@ -4,20 +4,21 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import FastAPI, Request, HTTPException
+import orjson
+from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 from database import (
-    DATABASE_PATH,
-    init_db, get_nas_config, save_nas_config,
+    DATABASE_PATH, get_data_version,
+    init_db, close_db, get_nas_config_cached, save_nas_config,
     get_folder_mappings, get_folder_mapping, create_folder_mapping,
     update_folder_mapping, delete_folder_mapping,
-    get_recent_sync_logs, get_mapping_sync_logs,
-    get_scheduler_config, save_scheduler_config,
+    iter_recent_sync_logs, get_mapping_sync_logs,
+    get_scheduler_config_cached, save_scheduler_config,
     get_post_sync_actions, create_post_sync_action,
     update_post_sync_action, delete_post_sync_action,
     get_f1_config, save_f1_config, get_f1_episodes,
@@ -25,8 +26,8 @@ from database import (
     get_cleanup_config, save_cleanup_config, get_cleanup_activity_log
 )
 from sync_engine import (
-    check_nas_online, test_ssh_connection, run_sync_all,
-    run_sync_single, get_sync_status
+    check_nas_online_cached, test_ssh_connection, run_sync_all,
+    run_sync_single, get_sync_status, close_http_client
 )
 from scheduler import (
     start_scheduler, stop_scheduler, update_scheduler,
@@ -48,18 +49,20 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting NAS Sync application")
     DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    await init_db()
+    scheduler_config = await init_db()
     start_scheduler()
-    await update_scheduler()
+    await update_scheduler(scheduler_config)
     await update_f1_scheduler()
     await update_cleanup_scheduler()
     yield
     # Shutdown
-    stop_scheduler()
+    await stop_scheduler()
+    await close_http_client()
+    await close_db()
     logger.info("NAS Sync application stopped")
 
 
-app = FastAPI(title="NAS Sync", lifespan=lifespan)
+app = FastAPI(title="NAS Sync", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -67,14 +70,23 @@ templates = Jinja2Templates(directory="templates")
 
 
 # Pydantic models for request validation
-class NASConfigRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: read-only once validated, unknown keys ignored."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
+class NASConfigRequest(RequestModel):
     hostname: str
     ssh_user: str
     ssh_key_path: str = "/config/id_rsa"
     ssh_port: int = 22
+    ssh_cipher: str = "aes128-gcm@openssh.com"  # empty = ssh default
+    compress: bool = False
+    max_parallel: int = 4  # mappings synced at once
+    online_check: str = "tcp"  # tcp | ping
 
 
-class FolderMappingRequest(BaseModel):
+class FolderMappingRequest(RequestModel):
     name: str
     source_path: str
     destination_path: str
@@ -82,21 +94,21 @@ class FolderMappingRequest(BaseModel):
     delete_source: bool = False
 
 
-class SchedulerConfigRequest(BaseModel):
+class SchedulerConfigRequest(RequestModel):
     enabled: bool
     interval_minutes: int = 15
     schedule_mode: str = "interval"  # interval | hourly | daily
     daily_time: str = "03:00"
 
 
-class PostSyncActionRequest(BaseModel):
+class PostSyncActionRequest(RequestModel):
     name: str
     action_type: str
     config: dict
     enabled: bool = True
 
 
-class F1ConfigRequest(BaseModel):
+class F1ConfigRequest(RequestModel):
     watch_folder: str
     output_folder: str
     tvdb_api_key: str = ""
@@ -106,7 +118,7 @@ class F1ConfigRequest(BaseModel):
     daily_time: str = "03:00"
 
 
-class CleanupConfigRequest(BaseModel):
+class CleanupConfigRequest(RequestModel):
     watch_folder: str
     min_age_minutes: int = 60
     remove_junk: bool = False
@@ -119,6 +131,21 @@ class CleanupConfigRequest(BaseModel):
 BUILD_VERSION = os.environ.get("BUILD_VERSION", "dev")
 
 
+def not_modified(request: Request, response: Response, extra: str = ""):
+    """Tag a GET with a weak ETag tied to the database write version.
+
+    Returns a 304 response if the client already holds the current copy,
+    otherwise sets the ETag on the outgoing response and returns None.
+    extra covers state that changes without a database write.
+    """
+    etag = f'W/"{get_data_version()}{extra}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 # Web UI route
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -127,8 +154,11 @@ async def index(request: Request):
 
 # NAS Config API
 @app.get("/api/nas-config")
-async def api_get_nas_config():
-    config = await get_nas_config()
+async def api_get_nas_config(request: Request, response: Response):
+    cached = not_modified(request, response)
+    if cached:
+        return cached
+    config = await get_nas_config_cached()
     return {"config": config}
 
 
@@ -138,24 +168,29 @@ async def api_save_nas_config(config: NASConfigRequest):
         hostname=config.hostname,
         ssh_user=config.ssh_user,
         ssh_key_path=config.ssh_key_path,
-        ssh_port=config.ssh_port
+        ssh_port=config.ssh_port,
+        ssh_cipher=config.ssh_cipher.strip(),
+        compress=config.compress,
+        max_parallel=max(1, config.max_parallel),
+        online_check="ping" if config.online_check == "ping" else "tcp"
     )
     return {"status": "ok"}
 
 
 @app.get("/api/nas-status")
 async def api_get_nas_status():
-    config = await get_nas_config()
+    config = await get_nas_config_cached()
     if not config:
         return {"online": False, "configured": False}
     
-    online = await check_nas_online(config['hostname'])
+    online = await check_nas_online_cached(config['hostname'], config['ssh_port'],
+                                           method=config.get('online_check') or "tcp")
     return {"online": online, "configured": True, "hostname": config['hostname']}
 
 
 @app.post("/api/nas-test")
 async def api_test_nas_connection():
-    config = await get_nas_config()
+    config = await get_nas_config_cached()
     if not config:
         return {"success": False, "message": "NAS not configured"}
     
@@ -163,14 +198,19 @@ async def api_test_nas_connection():
         hostname=config['hostname'],
         ssh_user=config['ssh_user'],
         ssh_key_path=config['ssh_key_path'],
-        ssh_port=config['ssh_port']
+        ssh_port=config['ssh_port'],
+        ssh_cipher=config.get('ssh_cipher'),
+        compress=bool(config.get('compress'))
     )
     return {"success": success, "message": message}
 
 
 # Folder Mappings API
 @app.get("/api/mappings")
-async def api_get_mappings():
+async def api_get_mappings(request: Request, response: Response):
+    cached = not_modified(request, response)
+    if cached:
+        return cached
     mappings = await get_folder_mappings()
     return {"mappings": mappings}
 
@@ -196,11 +236,7 @@ async def api_create_mapping(mapping: FolderMappingRequest):
 
 @app.put("/api/mappings/{mapping_id}")
 async def api_update_mapping(mapping_id: int, mapping: FolderMappingRequest):
-    existing = await get_folder_mapping(mapping_id)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Mapping not found")
-    
-    await update_folder_mapping(
+    updated = await update_folder_mapping(
         mapping_id=mapping_id,
         name=mapping.name,
         source_path=mapping.source_path,
@@ -208,12 +244,15 @@ async def api_update_mapping(mapping_id: int, mapping: FolderMappingRequest):
         enabled=mapping.enabled,
         delete_source=mapping.delete_source
     )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Mapping not found")
     return {"status": "ok"}
 
 
 @app.delete("/api/mappings/{mapping_id}")
 async def api_delete_mapping(mapping_id: int):
-    await delete_folder_mapping(mapping_id)
+    if not await delete_folder_mapping(mapping_id):
+        raise HTTPException(status_code=404, detail="Mapping not found")
     return {"status": "ok"}
 
 
@@ -240,11 +279,23 @@ async def api_run_sync_single(mapping_id: int):
     return result
 
 
+async def stream_json_list(key: str, rows):
+    """Encode {key: [rows...]} as rows arrive, never holding the whole list."""
+    yield f'{{"{key}": ['.encode()
+    separator = b""
+    async for row in rows:
+        yield separator + orjson.dumps(row)
+        separator = b", "
+    yield b"]}"
+
+
 # Logs API
 @app.get("/api/logs")
 async def api_get_logs(limit: int = 50):
-    logs = await get_recent_sync_logs(limit)
-    return {"logs": logs}
+    return StreamingResponse(
+        stream_json_list("logs", iter_recent_sync_logs(limit)),
+        media_type="application/json"
+    )
 
 
 @app.get("/api/logs/mapping/{mapping_id}")
@@ -255,27 +306,34 @@ async def api_get_mapping_logs(mapping_id: int, limit: int = 20):
 
 # Scheduler API
 @app.get("/api/scheduler")
-async def api_get_scheduler():
-    config = await get_scheduler_config()
+async def api_get_scheduler(request: Request, response: Response):
     status = get_scheduler_status()
+    # next-run times move without any database write
+    cached = not_modified(request, response, f"-{hash(frozenset(status.items())) & 0xffffffff:08x}")
+    if cached:
+        return cached
+    config = await get_scheduler_config_cached()
     return {"config": config, "status": status}
 
 
 @app.post("/api/scheduler")
 async def api_save_scheduler(config: SchedulerConfigRequest):
-    await save_scheduler_config(
+    saved = await save_scheduler_config(
         enabled=config.enabled,
         interval_minutes=config.interval_minutes,
         schedule_mode=config.schedule_mode,
         daily_time=config.daily_time
     )
-    await update_scheduler()
+    await update_scheduler(saved)
     return {"status": "ok"}
 
 
 # Post-sync Actions API
 @app.get("/api/actions")
-async def api_get_actions():
+async def api_get_actions(request: Request, response: Response):
+    cached = not_modified(request, response)
+    if cached:
+        return cached
     actions = await get_post_sync_actions()
     return {"actions": actions}
 
@@ -292,19 +350,22 @@ async def api_create_action(action: PostSyncActionRequest):
 
 @app.put("/api/actions/{action_id}")
 async def api_update_action(action_id: int, action: PostSyncActionRequest):
-    await update_post_sync_action(
+    updated = await update_post_sync_action(
         action_id=action_id,
         name=action.name,
         action_type=action.action_type,
         config=action.config,
         enabled=action.enabled
     )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Action not found")
     return {"status": "ok"}
 
 
 @app.delete("/api/actions/{action_id}")
 async def api_delete_action(action_id: int):
-    await delete_post_sync_action(action_id)
+    if not await delete_post_sync_action(action_id):
+        raise HTTPException(status_code=404, detail="Action not found")
     return {"status": "ok"}
 
 
@@ -1,7 +1,7 @@
+import asyncio
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
+import time
+from datetime import datetime, timedelta
 
 from database import get_scheduler_config, get_f1_config, get_cleanup_config
 from sync_engine import run_sync_all
@@ -10,34 +10,53 @@ from download_cleanup import run_cleanup
 
 logger = logging.getLogger(__name__)
 
-# coalesce + generous misfire grace: if a run is delayed (long sync, container
-# restart), run it once late instead of silently dropping it.
-scheduler = AsyncIOScheduler(
-    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 3600}
-)
+# Each enabled job is one asyncio task that sleeps until its next run time and
+# awaits the job coroutine; a run that overruns its slot just delays the next
+# one (the old coalesce + max_instances=1 behaviour) instead of being dropped.
 JOB_ID = "nas_sync_job"
 F1_JOB_ID = "f1_scan_job"
 CLEANUP_JOB_ID = "cleanup_job"
 
+_running = False
+_jobs: dict[str, asyncio.Task] = {}
+_next_runs: dict[str, datetime] = {}
+# Job runs in progress. They outlive their (cancelled) loop, so shutdown has
+# to settle them before the database is closed.
+_runs: set[asyncio.Task] = set()
+# Seconds a run gets to finish on shutdown before it is cancelled; well
+# inside docker stop's 10 second grace period
+SHUTDOWN_GRACE = 5
+
 
 def build_trigger(schedule_mode: str, interval_minutes: int, daily_time: str,
                   hourly_minute: int = 0):
-    """Build an APScheduler trigger from a schedule config.
+    """Build a next-run function from a schedule config.
 
-    hourly_minute staggers the hourly jobs so they don't all fire at once.
+    The returned function maps a naive local datetime to the next naive local
+    run time strictly after it. hourly_minute staggers the hourly jobs so they
+    don't all fire at once.
     """
     if schedule_mode == "daily":
         try:
             hour, minute = (int(p) for p in (daily_time or "03:00").split(":")[:2])
         except (ValueError, AttributeError):
             hour, minute = 3, 0
-        return CronTrigger(hour=hour, minute=minute), f"daily at {hour:02d}:{minute:02d}"
+
+        def next_daily(now: datetime) -> datetime:
+            run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            return run if run > now else run + timedelta(days=1)
+
+        return next_daily, f"daily at {hour:02d}:{minute:02d}"
 
     if schedule_mode == "hourly":
-        return CronTrigger(minute=hourly_minute), f"hourly at :{hourly_minute:02d}"
+        def next_hourly(now: datetime) -> datetime:
+            run = now.replace(minute=hourly_minute, second=0, microsecond=0)
+            return run if run > now else run + timedelta(hours=1)
+
+        return next_hourly, f"hourly at :{hourly_minute:02d}"
 
     minutes = max(1, int(interval_minutes or 15))
-    return IntervalTrigger(minutes=minutes), f"every {minutes} minutes"
+    return (lambda now: now + timedelta(minutes=minutes)), f"every {minutes} minutes"
 
 
 async def scheduled_sync():
@@ -73,23 +92,45 @@ async def scheduled_cleanup():
         logger.error(f"Scheduled cleanup error: {e}")
 
 
+async def _job_loop(job_id: str, func, trigger):
+    """Sleep until each next run time and await the job."""
+    last_run = datetime.now()
+    while True:
+        # Never compute from before the last run, so an early wakeup can't fire twice
+        last_run = trigger(max(datetime.now(), last_run))
+        # astimezone() on a naive time resolves the local UTC offset, DST included
+        _next_runs[job_id] = last_run.astimezone()
+        await asyncio.sleep(max(0.0, _next_runs[job_id].timestamp() - time.time()))
+        # Shielded so rescheduling (which cancels this loop) doesn't abort a run in progress
+        run = asyncio.ensure_future(func())
+        _runs.add(run)
+        run.add_done_callback(_runs.discard)
+        await asyncio.shield(run)
+
+
+def _remove_job(job_id: str):
+    task = _jobs.pop(job_id, None)
+    if task:
+        task.cancel()
+    _next_runs.pop(job_id, None)
+
+
 def _apply_job(job_id: str, func, enabled: bool, trigger, description: str, label: str):
     """Add, replace or remove a job to match the desired config."""
-    if scheduler.get_job(job_id):
-        scheduler.remove_job(job_id)
+    _remove_job(job_id)
 
     if enabled:
-        scheduler.add_job(func, trigger=trigger, id=job_id, replace_existing=True)
-        job = scheduler.get_job(job_id)
-        next_run = job.next_run_time.isoformat() if job and job.next_run_time else "unknown"
+        _jobs[job_id] = asyncio.create_task(_job_loop(job_id, func, trigger))
+        next_run = trigger(datetime.now()).astimezone().isoformat()
         logger.info(f"{label} scheduled {description} (next run: {next_run})")
     else:
         logger.info(f"{label} schedule disabled")
 
 
-async def update_scheduler():
-    """Update sync scheduler based on current config."""
-    config = await get_scheduler_config()
+async def update_scheduler(config: dict = None):
+    """Update sync scheduler based on the given (or current) config."""
+    if config is None:
+        config = await get_scheduler_config()
     trigger, description = build_trigger(
         config.get("schedule_mode", "interval"),
         config.get("interval_minutes", 15),
@@ -127,24 +168,36 @@ async def update_cleanup_scheduler():
 
 def start_scheduler():
     """Start the scheduler."""
-    if not scheduler.running:
-        scheduler.start()
+    global _running
+    if not _running:
+        _running = True
         logger.info("Scheduler started")
 
 
-def stop_scheduler():
-    """Stop the scheduler."""
-    if scheduler.running:
-        scheduler.shutdown()
+async def stop_scheduler():
+    """Stop the scheduler and settle any job run still in progress.
+
+    A run gets SHUTDOWN_GRACE seconds to finish, then is cancelled (a sync
+    kills its rsync); either way it is done before this returns.
+    """
+    global _running
+    if _running:
+        for job_id in list(_jobs):
+            _remove_job(job_id)
+        _running = False
+        if _runs:
+            runs = list(_runs)
+            _, pending = await asyncio.wait(runs, timeout=SHUTDOWN_GRACE)
+            for run in pending:
+                logger.info("Cancelling job run still in progress at shutdown")
+                run.cancel()
+            await asyncio.gather(*runs, return_exceptions=True)
         logger.info("Scheduler stopped")
 
 
 def _job_status(job_id: str):
-    job = scheduler.get_job(job_id)
-    return (
-        job is not None,
-        job.next_run_time.isoformat() if job and job.next_run_time else None
-    )
+    next_run = _next_runs.get(job_id)
+    return job_id in _jobs, next_run.isoformat() if next_run else None
 
 
 def get_scheduler_status():
@@ -153,7 +206,7 @@ def get_scheduler_status():
     f1_active, f1_next = _job_status(F1_JOB_ID)
     cleanup_active, cleanup_next = _job_status(CLEANUP_JOB_ID)
     return {
-        "running": scheduler.running,
+        "running": _running,
         "job_active": job_active,
         "next_run": next_run,
         "f1_job_active": f1_active,
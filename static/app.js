@@ -80,9 +80,10 @@ function formatBytes(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(1)) + ' ' + sizes[i];
 }
 
+// Sync timestamps arrive as epoch seconds, activity logs as SQLite date strings
 function formatDate(dateStr) {
     if (!dateStr) return '—';
-    const date = new Date(dateStr);
+    const date = typeof dateStr === 'number' ? new Date(dateStr * 1000) : new Date(dateStr);
     if (isNaN(date)) return '—';
     return date.toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' });
 }
@@ -441,6 +442,10 @@ async function loadNasConfig() {
         document.getElementById('nas-user').value = config.ssh_user || '';
         document.getElementById('nas-key-path').value = config.ssh_key_path || '/config/id_rsa';
         document.getElementById('nas-port').value = config.ssh_port || 22;
+        document.getElementById('nas-cipher').value = config.ssh_cipher ?? 'aes128-gcm@openssh.com';
+        document.getElementById('nas-compress').checked = !!config.compress;
+        document.getElementById('nas-max-parallel').value = config.max_parallel || 4;
+        document.getElementById('nas-online-check').value = config.online_check || 'tcp';
     }
 }
 
@@ -449,7 +454,11 @@ async function saveNasConfig() {
         hostname: document.getElementById('nas-hostname').value,
         ssh_user: document.getElementById('nas-user').value,
         ssh_key_path: document.getElementById('nas-key-path').value,
-        ssh_port: parseInt(document.getElementById('nas-port').value) || 22
+        ssh_port: parseInt(document.getElementById('nas-port').value) || 22,
+        ssh_cipher: document.getElementById('nas-cipher').value,
+        compress: document.getElementById('nas-compress').checked,
+        max_parallel: parseInt(document.getElementById('nas-max-parallel').value) || 4,
+        online_check: document.getElementById('nas-online-check').value
     };
     if (!data.hostname || !data.ssh_user) {
         showToast('Hostname and SSH user are required', 'error');
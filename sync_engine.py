@@ -1,28 +1,91 @@
 import asyncio
 import os
+import shutil
+import signal
+import socket
 import subprocess
 import re
+import shlex
+import tempfile
+import time
 import httpx
-from datetime import datetime
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Optional, Tuple
 import logging
 
 from database import (
-    get_nas_config, get_folder_mappings, update_mapping_sync_status,
-    create_sync_log, get_post_sync_actions
+    get_nas_config, get_folder_mappings, record_sync_results,
+    get_post_sync_actions
 )
 
 logger = logging.getLogger(__name__)
 
-# Global sync state
-sync_in_progress = False
-current_sync_mapping = None
+# Global sync state: held for the whole of a sync run (all or single)
+_sync_lock = asyncio.Lock()
+current_sync_mappings: set[int] = set()
 
+# One HTTP client for post-sync actions, so repeat calls to the same Plex or
+# webhook host reuse a kept-alive connection instead of a new TLS handshake
+_http_client: Optional[httpx.AsyncClient] = None
 
-async def check_nas_online(hostname: str, timeout: int = 2) -> bool:
-    """Check if NAS is reachable via ping."""
+
+def _get_http() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=10, limits=httpx.Limits(max_keepalive_connections=10)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared post-sync HTTP client (application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _spawn(*cmd, **kwargs) -> asyncio.subprocess.Process:
+    """Start a subprocess; every launch in this module goes through here.
+
+    There's no need to push the spawn onto a thread: since Python 3.10,
+    subprocess on Linux starts children with vfork() unless a preexec_fn
+    (or user/group switch) is given, so launching rsync doesn't copy this
+    process's page tables and the loop isn't held for long. Keep it that way.
+    """
+    return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+
+def _kill_group(process: asyncio.subprocess.Process):
+    """SIGTERM a child started with start_new_session=True and everything it spawned."""
     try:
-        process = await asyncio.create_subprocess_exec(
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+async def check_nas_online(hostname: str, port: int = 22, timeout: int = 2,
+                           method: str = "tcp") -> bool:
+    """Check if NAS is reachable.
+
+    By default this opens a TCP connection to the SSH port, which is what the
+    sync actually needs and works where ICMP is firewalled. method="ping"
+    keeps the old ICMP check for setups where the SSH port isn't reachable
+    directly.
+    """
+    if method != "ping":
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(hostname, port), timeout)
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    try:
+        process = await _spawn(
             "ping", "-c", "1", "-W", str(timeout), hostname,
             stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.DEVNULL
@@ -30,20 +93,53 @@ async def check_nas_online(hostname: str, timeout: int = 2) -> bool:
         await process.wait()
         return process.returncode == 0
     except Exception as e:
-        logger.error(f"Error checking NAS status: {e}")
+        logger.error("Error checking NAS status: %s", e)
         return False
 
 
-async def test_ssh_connection(hostname: str, ssh_user: str, ssh_key_path: str, ssh_port: int = 22) -> Tuple[bool, str]:
-    """Test SSH connection to NAS."""
+# Reachability results are reused briefly: the UI polls nas-status and a sync
+# run checks again right after. A failure is kept for less time so a NAS that
+# just came up is noticed quickly.
+ONLINE_CACHE_TTL = 10
+OFFLINE_CACHE_TTL = 2
+_online_cache: dict = {}
+
+
+async def check_nas_online_cached(hostname: str, port: int = 22, method: str = "tcp") -> bool:
+    """check_nas_online(), reusing a recent result for the same host and port."""
+    key = (hostname, port, method)
+    now = time.monotonic()
+    cached = _online_cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    online = await check_nas_online(hostname, port, method=method)
+    _online_cache[key] = (online, now + (ONLINE_CACHE_TTL if online else OFFLINE_CACHE_TTL))
+    return online
+
+
+async def resolve_host(hostname: str, port: int = 22) -> str:
+    """Resolve hostname to an address, or return it unchanged if that fails.
+
+    Done once per sync run so the ssh/rsync children don't each do their
+    own DNS lookup; ssh reports the real error if the name doesn't resolve.
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            hostname, port, type=socket.SOCK_STREAM
+        )
+        return infos[0][4][0]
+    except (OSError, IndexError):
+        return hostname
+
+
+async def test_ssh_connection(hostname: str, ssh_user: str, ssh_key_path: str, ssh_port: int = 22,
+                              ssh_cipher: str = None, compress: bool = False) -> Tuple[bool, str]:
+    """Test SSH connection to NAS, with the same ssh options a sync uses."""
     try:
-        process = await asyncio.create_subprocess_exec(
+        process = await _spawn(
             "ssh",
-            "-i", ssh_key_path,
-            "-p", str(ssh_port),
-            "-o", "StrictHostKeyChecking=accept-new",
+            *_ssh_options(ssh_key_path, ssh_port, ssh_cipher=ssh_cipher, compress=compress),
             "-o", "ConnectTimeout=5",
-            "-o", "BatchMode=yes",
             f"{ssh_user}@{hostname}",
             "echo 'Connection successful'",
             stdout=asyncio.subprocess.PIPE,
@@ -60,97 +156,355 @@ async def test_ssh_connection(hostname: str, ssh_user: str, ssh_key_path: str, s
         return False, f"SSH test error: {str(e)}"
 
 
-def parse_rsync_output(output: str) -> dict:
-    """Parse rsync output to extract transfer statistics."""
+def _ssh_options(ssh_key_path: str, ssh_port: int, control_path: str = None,
+                 ssh_cipher: str = None, compress: bool = False,
+                 host_key_alias: str = None) -> list:
+    """Common ssh options for non-interactive connections to the NAS.
+
+    No tty or X11, an AES-GCM cipher (cheap with AES-NI) and no compression
+    unless asked for. With control_path, the connection rides on an open
+    master (see ssh_master), which then decides the cipher and compression.
+    host_key_alias keeps known_hosts keyed by the configured name when
+    connecting to a pre-resolved address.
+    """
+    options = [
+        "-T", "-x", "-i", ssh_key_path, "-p", str(int(ssh_port)),
+        "-o", "StrictHostKeyChecking=accept-new", "-o", "BatchMode=yes", "-o", "LogLevel=ERROR",
+        "-o", f"Compression={'yes' if compress else 'no'}",
+    ]
+    if ssh_cipher:
+        options += ["-c", ssh_cipher]
+    if host_key_alias:
+        options += ["-o", f"HostKeyAlias={host_key_alias}"]
+    if control_path:
+        options += ["-o", "ControlMaster=auto", "-o", f"ControlPath={control_path}"]
+    return options
+
+
+def _host_key_alias(nas_config: dict) -> Optional[str]:
+    """The configured hostname, if connections go to a different resolved address.
+
+    ssh looks an alias up in known_hosts as-is, so a non-22 port is added the
+    way ssh itself writes it ([host]:port) to keep matching existing entries.
+    """
+    resolved = nas_config.get('hostname_resolved')
+    if not resolved or resolved == nas_config['hostname']:
+        return None
+    port = int(nas_config['ssh_port'])
+    return nas_config['hostname'] if port == 22 else f"[{nas_config['hostname']}]:{port}"
+
+
+@asynccontextmanager
+async def ssh_master(nas_config: dict):
+    """Hold one multiplexed SSH connection to the NAS open for a sync pass.
+
+    Yields the ControlPath socket for the rsync ssh sessions to reuse, so
+    only the first connection pays for the TCP and key exchange. Yields None
+    if the master couldn't be started; each rsync then connects on its own.
+    """
+    control_dir = tempfile.mkdtemp(prefix="nas-sync-ssh-")
+    control_path = os.path.join(control_dir, "master.sock")
+    address = nas_config.get('hostname_resolved') or nas_config['hostname']
+    target = f"{nas_config['ssh_user']}@{address}"
+    started = False
+    try:
+        # -f backgrounds once authenticated; ControlPersist reaps it if exit is never sent
+        process = await _spawn(
+            "ssh", "-M", "-N", "-f",
+            "-o", f"ControlPath={control_path}", "-o", "ControlPersist=60",
+            "-o", "ConnectTimeout=5",
+            *_ssh_options(nas_config['ssh_key_path'], nas_config['ssh_port'],
+                          ssh_cipher=nas_config.get('ssh_cipher'),
+                          compress=bool(nas_config.get('compress')),
+                          host_key_alias=_host_key_alias(nas_config)),
+            target,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        started = await process.wait() == 0
+    except Exception as e:
+        logger.warning("SSH master connection error: %s", e)
+    if not started:
+        logger.warning("SSH master connection unavailable, rsync will connect per mapping")
+
+    try:
+        yield control_path if started else None
+    finally:
+        if started:
+            try:
+                process = await _spawn(
+                    "ssh", "-o", f"ControlPath={control_path}", "-O", "exit", target,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                await process.wait()
+            except Exception as e:
+                logger.warning("Error closing SSH master connection: %s", e)
+        shutil.rmtree(control_dir, ignore_errors=True)
+
+
+# Match the summary line "sent 1,234 bytes  received 56 bytes  ..." (or the
+# --stats "Total bytes sent: 1,234") and "Number of [regular] files transferred: 5".
+# Byte patterns, so rsync's stdout is parsed without decoding it.
+_RSYNC_BYTES = re.compile(rb'sent ([\d,]+) bytes')
+_RSYNC_TOTAL_BYTES = re.compile(rb'Total bytes sent: ([\d,]+)')
+_RSYNC_FILES = re.compile(rb'Number of (?:regular )?files transferred: ([\d,]+)')
+
+
+# Only the --stats summary at the end of rsync's stdout is parsed, and only
+# the end of stderr is shown when rsync fails
+RSYNC_TAIL_BYTES = 8192
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int = RSYNC_TAIL_BYTES) -> bytes:
+    """Drain a stream to EOF, keeping only its last limit bytes.
+
+    Reads fixed-size chunks rather than lines, so output without newlines
+    (e.g. progress redrawn with carriage returns) can't overrun a line limit.
+    """
+    tail = b""
+    while chunk := await stream.read(65536):
+        tail = (tail + chunk)[-limit:]
+    return tail
+
+
+# With folders sent by name (a coalesced run), --out-format logs each sent
+# file as "<itemize> <bytes> <path>" and the path starts with the folder's
+# name, so the run's stats can be split per mapping
+RSYNC_OUT_FORMAT = "%i %b %n"
+_RSYNC_SENT_FILE = re.compile(rb'<f\S* (\d+) ([^/\n]+)/')
+
+
+async def _read_transfers(stream: asyncio.StreamReader,
+                          limit: int = RSYNC_TAIL_BYTES) -> Tuple[bytes, dict]:
+    """Drain rsync's stdout, totalling the --out-format file lines per folder.
+
+    Returns the last limit bytes of the other output (the --stats summary)
+    and {folder name: {"files_transferred": n, "bytes_transferred": n}}.
+    """
+    tail = b""
+    per_source = {}
+    while line := await stream.readline():
+        match = _RSYNC_SENT_FILE.match(line)
+        if match:
+            counts = per_source.setdefault(match.group(2).decode(errors="replace"),
+                                           {"files_transferred": 0, "bytes_transferred": 0})
+            counts["files_transferred"] += 1
+            counts["bytes_transferred"] += int(match.group(1))
+        else:
+            tail = (tail + line)[-limit:]
+    return tail, per_source
+
+
+def parse_rsync_output(output: bytes) -> dict:
+    """Parse raw rsync stdout to extract transfer statistics."""
     stats = {
         "files_transferred": 0,
         "bytes_transferred": 0
     }
     
-    # Match patterns like "sent 1,234 bytes" or "Number of files transferred: 5"
-    bytes_match = re.search(r'sent ([\d,]+) bytes', output)
+    bytes_match = _RSYNC_BYTES.search(output) or _RSYNC_TOTAL_BYTES.search(output)
     if bytes_match:
-        stats["bytes_transferred"] = int(bytes_match.group(1).replace(",", ""))
+        stats["bytes_transferred"] = int(bytes_match.group(1).replace(b",", b""))
     
-    files_match = re.search(r'Number of regular files transferred: (\d+)', output)
+    files_match = _RSYNC_FILES.search(output)
     if files_match:
-        stats["files_transferred"] = int(files_match.group(1))
+        stats["files_transferred"] = int(files_match.group(1).replace(b",", b""))
     
     return stats
 
 
 async def run_rsync(source: str, destination: str, ssh_user: str, hostname: str, 
-                    ssh_key_path: str, ssh_port: int = 22, delete_source: bool = False) -> Tuple[bool, str, dict]:
+                    ssh_key_path: str, ssh_port: int = 22, delete_source: bool = False,
+                    control_path: str = None, ssh_cipher: str = None,
+                    compress: bool = False, host_key_alias: str = None) -> Tuple[bool, str, dict]:
     """Run rsync to sync files from source to destination on remote NAS."""
-    
-    # Build rsync command
-    ssh_cmd = (
-        f"ssh -i {ssh_key_path} -p {ssh_port} "
-        "-o StrictHostKeyChecking=accept-new -o BatchMode=yes -o LogLevel=ERROR"
-    )
-
     # Ensure source path ends with / to sync contents
     if not source.endswith('/'):
         source = source + '/'
 
+    return await run_rsync_multi(
+        [source], destination, ssh_user, hostname, ssh_key_path, ssh_port, delete_source,
+        control_path, ssh_cipher, compress, host_key_alias
+    )
+
+
+async def run_rsync_multi(sources: list, destination: str, ssh_user: str, hostname: str,
+                          ssh_key_path: str, ssh_port: int = 22, delete_source: bool = False,
+                          control_path: str = None, ssh_cipher: str = None,
+                          compress: bool = False, host_key_alias: str = None) -> Tuple[bool, str, dict]:
+    """Run one rsync with several sources into destination on the remote NAS.
+
+    Sources are passed through as given: with a trailing / rsync copies the
+    folder's contents, without one it copies the folder itself. For folders
+    sent by name, stats also has "per_source": the files and bytes sent from
+    each, keyed by folder name (see _read_transfers).
+    """
+    
+    # Build rsync command
+    # rsync splits -e itself, honouring shell-style quoting, so quote each
+    # option and a key path or socket with spaces stays one argument
+    ssh_cmd = shlex.join(["ssh", *_ssh_options(ssh_key_path, ssh_port, control_path,
+                                               ssh_cipher, compress, host_key_alias)])
+
     # Note: no -z — compression triggers "deflate on token returned 0" protocol
     # errors between mismatched rsync versions, and media files don't compress.
+    # The optional compression is done by ssh instead.
+    # -W skips the delta algorithm (the LAN is faster than the checksumming) and
+    # --inplace writes straight into the destination file, which also keeps
+    # partial transfers without a separate --partial. No -v or progress output:
+    # only the --stats summary is read (plus a line per sent file for folders
+    # sent by name, totalled as it streams).
     cmd = [
         "rsync",
-        "-av",
+        "-a",
+        "-W",
+        "--inplace",
+        "--numeric-ids",
         "--stats",
-        "--partial",
         "--timeout=600",
         "-e", ssh_cmd,
     ]
     
     if delete_source:
         cmd.append("--remove-source-files")
+    # A folder sent by name lands in destination/<name>; if that is a symlink
+    # on the NAS, -K follows it like the single-mapping contents/ sync does
+    # instead of replacing it with a real directory
+    by_name = any(not s.endswith('/') for s in sources)
+    if by_name:
+        cmd += ["--keep-dirlinks", f"--out-format={RSYNC_OUT_FORMAT}"]
     
-    # Remote destination
-    remote_dest = f"{ssh_user}@{hostname}:{destination}"
-    cmd.extend([source, remote_dest])
+    # Remote destination (not quoted: rsync >= 3.2.4 escapes remote args itself)
+    # (an IPv6 address needs brackets to be told apart from the path)
+    host = f"[{hostname}]" if ":" in hostname else hostname
+    remote_dest = f"{ssh_user}@{host}:{destination}"
+    cmd.extend([*sources, remote_dest])
     
-    logger.info(f"Running rsync: {' '.join(cmd)}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Running rsync: %s", shlex.join(cmd))
     
     try:
-        process = await asyncio.create_subprocess_exec(
+        # Own session/process group, so an abandoned run can take rsync's ssh
+        # child down with it. Stalls are already bounded by --timeout.
+        process = await _spawn(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
         )
-        stdout, stderr = await process.communicate()
-        
-        output = stdout.decode()
-        error_output = stderr.decode()
+        try:
+            # Drain both pipes together so neither can fill up and stall rsync,
+            # without holding the whole (file list + progress) transcript in memory
+            if by_name:
+                (stdout, per_source), stderr = await asyncio.gather(
+                    _read_transfers(process.stdout), _read_tail(process.stderr))
+            else:
+                stdout, stderr = await asyncio.gather(
+                    _read_tail(process.stdout), _read_tail(process.stderr))
+                per_source = None
+            await process.wait()
+        except BaseException:
+            # Cancelled (e.g. shutdown) or the pipes failed: don't leave rsync running
+            _kill_group(process)
+            raise
         
         if process.returncode == 0:
-            stats = parse_rsync_output(output)
-            return True, "Sync completed successfully", stats
+            stats = parse_rsync_output(stdout)
+            success, message = True, "Sync completed successfully"
         else:
-            error_msg = error_output.strip() or output.strip() or "Unknown rsync error"
-            return False, f"Rsync failed: {error_msg}", {"files_transferred": 0, "bytes_transferred": 0}
+            error_msg = (stderr.decode(errors="replace").strip()
+                         or stdout.decode(errors="replace").strip()
+                         or "Unknown rsync error")
+            stats = {"files_transferred": 0, "bytes_transferred": 0}
+            success, message = False, f"Rsync failed: {error_msg}"
+        # Files sent before a failure did arrive, so these count either way
+        if per_source is not None:
+            stats["per_source"] = per_source
+        return success, message, stats
             
     except Exception as e:
-        logger.error(f"Rsync execution error: {e}")
+        logger.error("Rsync execution error: %s", e)
         return False, f"Rsync error: {str(e)}", {"files_transferred": 0, "bytes_transferred": 0}
 
 
+# Tree fingerprint: mtime (whole seconds), size, type and relative path of
+# every entry, sorted and hashed. Directory sizes and mtimes differ between
+# filesystems, so those are left out. rsync -a keeps mtimes, so a tree that
+# rsync would find nothing to do for hashes the same on both ends. Extra files
+# on the NAS side make the digests differ, which just means rsync runs.
+# find writes to a temp file first: in a pipe its exit status would be lost,
+# and a partial listing (unreadable subfolder, a find without -printf) must
+# fail the probe rather than hash. Plain sh has no pipefail everywhere.
+_FINGERPRINT_SCRIPT = (
+    "cd {path} && t=$(mktemp) || exit 1; "
+    "if find . -mindepth 1 "
+    "\\( -type d -printf '0 0 d %P\\n' \\) -o -printf '%T@ %s %y %P\\n' >\"$t\"; then "
+    "sed 's/^\\([0-9]*\\)\\.[0-9]* /\\1 /' \"$t\" | LC_ALL=C sort | sha256sum; r=$?; "
+    "else r=1; fi; rm -f \"$t\"; exit $r"
+)
+FINGERPRINT_TIMEOUT = 300
+
+
+async def _run_fingerprint(*cmd) -> Optional[bytes]:
+    """Run a fingerprint command; returns its output, or None if it failed."""
+    process = await _spawn(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        start_new_session=True
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), FINGERPRINT_TIMEOUT)
+    except BaseException:
+        _kill_group(process)
+        raise
+    return stdout if process.returncode == 0 else None
+
+
+async def tree_unchanged(mapping: dict, nas_config: dict) -> bool:
+    """True if a mapping's source and NAS destination fingerprint the same.
+
+    Only used over the sync pass's SSH master (one extra session, no new
+    handshake) and never for delete_source mappings, which need rsync to
+    remove the sent files. Any failure counts as changed, so rsync runs.
+    """
+    control_path = nas_config.get('control_path')
+    if not control_path or mapping['delete_source']:
+        return False
+
+    address = nas_config.get('hostname_resolved') or nas_config['hostname']
+    try:
+        local, remote = await asyncio.gather(
+            _run_fingerprint("sh", "-c", _FINGERPRINT_SCRIPT.format(
+                path=shlex.quote(mapping['source_path']))),
+            _run_fingerprint(
+                "ssh", *_ssh_options(nas_config['ssh_key_path'], nas_config['ssh_port'],
+                                     control_path, host_key_alias=_host_key_alias(nas_config)),
+                f"{nas_config['ssh_user']}@{address}",
+                _FINGERPRINT_SCRIPT.format(path=shlex.quote(mapping['destination_path']))
+            )
+        )
+    except Exception as e:
+        logger.warning("Tree fingerprint for mapping '%s' failed: %r", mapping['name'], e)
+        return False
+    return local is not None and local == remote
+
+
 async def execute_post_sync_actions():
-    """Execute all enabled post-sync actions."""
-    actions = await get_post_sync_actions()
+    """Execute all enabled post-sync actions concurrently."""
+    handlers = {'plex_refresh': execute_plex_refresh, 'webhook': execute_webhook}
+    actions = [a for a in await get_post_sync_actions(enabled_only=True)
+               if a['action_type'] in handlers]
     
-    for action in actions:
-        if not action['enabled']:
-            continue
-            
-        try:
-            if action['action_type'] == 'plex_refresh':
-                await execute_plex_refresh(action['config'])
-            elif action['action_type'] == 'webhook':
-                await execute_webhook(action['config'])
-        except Exception as e:
-            logger.error(f"Post-sync action '{action['name']}' failed: {e}")
+    outcomes = await asyncio.gather(
+        *(handlers[a['action_type']](a['config']) for a in actions), return_exceptions=True
+    )
+    for action, outcome in zip(actions, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("Post-sync action '%s' failed: %s", action['name'], outcome)
 
 
 async def execute_plex_refresh(config: dict):
@@ -165,12 +519,11 @@ async def execute_plex_refresh(config: dict):
     
     url = f"{plex_url}/library/sections/{library_section}/refresh?X-Plex-Token={plex_token}"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, timeout=10)
-        if response.status_code == 200:
-            logger.info(f"Plex library section {library_section} refresh triggered")
-        else:
-            logger.warning(f"Plex refresh returned status {response.status_code}")
+    response = await _get_http().get(url)
+    if response.status_code == 200:
+        logger.info("Plex library section %s refresh triggered", library_section)
+    else:
+        logger.warning("Plex refresh returned status %s", response.status_code)
 
 
 async def execute_webhook(config: dict):
@@ -182,13 +535,13 @@ async def execute_webhook(config: dict):
         logger.warning("Webhook skipped: missing URL")
         return
     
-    async with httpx.AsyncClient() as client:
-        if method == 'GET':
-            response = await client.get(url, timeout=10)
-        else:
-            response = await client.post(url, timeout=10)
-        
-        logger.info(f"Webhook {url} returned status {response.status_code}")
+    client = _get_http()
+    if method == 'GET':
+        response = await client.get(url)
+    else:
+        response = await client.post(url)
+    
+    logger.info("Webhook %s returned status %s", url, response.status_code)
 
 
 def prune_empty_dirs(source: str) -> int:
@@ -219,87 +572,241 @@ def prune_empty_dirs(source: str) -> int:
     return removed
 
 
-async def sync_mapping(mapping: dict, nas_config: dict) -> bool:
-    """Sync a single folder mapping."""
-    global current_sync_mapping
-    
-    mapping_id = mapping['id']
-    current_sync_mapping = mapping_id
-    started_at = datetime.utcnow().isoformat()
+@dataclass
+class SyncResult:
+    """Outcome of one mapping's sync; timestamps are epoch seconds."""
+    mapping_id: int
+    mapping_name: str
+    status: str
+    message: str
+    files_transferred: int = 0
+    bytes_transferred: int = 0
+    duration_seconds: Optional[float] = None
+    started_at: Optional[int] = None
+    completed_at: Optional[int] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == "success"
+
+
+async def record_results(results: list):
+    """Write the mapping statuses and sync logs for results in one transaction."""
+    await record_sync_results(
+        [(r.completed_at, r.status, r.message, r.mapping_id) for r in results],
+        [(r.mapping_id, r.status, r.message, r.files_transferred, r.bytes_transferred,
+          r.duration_seconds, r.started_at, r.completed_at, r.mapping_name)
+         for r in results]
+    )
+
+
+def _group_key(mapping: dict):
+    """Key under which a mapping can share an rsync run, or None if it can't."""
+    source = mapping['source_path'].rstrip('/')
+    destination = mapping['destination_path'].rstrip('/')
+    name = os.path.basename(source)
+    # A missing source would fail the whole shared run, so leave it on its own.
+    # A symlinked source too: sent by name, rsync -a would copy the link itself
+    # (and --remove-source-files delete it) rather than the folder behind it.
+    if (not name or name != os.path.basename(destination)
+            or not os.path.dirname(destination) or not os.path.isdir(source)
+            or os.path.islink(source)):
+        return None
+    return os.path.dirname(source), os.path.dirname(destination), bool(mapping['delete_source'])
+
+
+def group_mappings(mappings: list) -> list:
+    """Group mappings that one rsync run can sync together.
+
+    Syncing parent/a/ -> dest/a and parent/b/ -> dest/b is the same as
+    `rsync parent/a parent/b host:dest/`, so mappings whose source and
+    destination folders share a parent and a name, and that agree on
+    delete_source, are run together. Everything else stays on its own.
+    """
+    groups = {}
+    for mapping in mappings:
+        key = _group_key(mapping) or ("mapping", mapping['id'])
+        groups.setdefault(key, []).append(mapping)
+    return list(groups.values())
+
+
+def _paths_overlap(a: str, b: str) -> bool:
+    """True if two paths are the same or one is inside the other."""
+    a, b = os.path.normpath(a), os.path.normpath(b)
+    try:
+        return os.path.commonpath([a, b]) in (a, b)
+    except ValueError:
+        # One absolute, one relative
+        return False
+
+
+def group_lanes(groups: list) -> list:
+    """Split groups from group_mappings() into lanes that can run in parallel.
+
+    Groups whose source or destination paths are equal or nested share a
+    lane and run one after another: side by side, one rsync's
+    --remove-source-files would pull files out from under the other, and two
+    --inplace writers could interleave into the same NAS file.
+    """
+    lanes = []
+    for group in groups:
+        lane = {"sources": [m['source_path'] for m in group],
+                "destinations": [m['destination_path'] for m in group],
+                "groups": [group]}
+        overlapping = [
+            other for other in lanes
+            if any(_paths_overlap(a, b) for key in ("sources", "destinations")
+                   for a in other[key] for b in lane[key])
+        ]
+        for other in overlapping:
+            lanes.remove(other)
+            for key in lane:
+                lane[key] = other[key] + lane[key]
+        lanes.append(lane)
+    return [lane["groups"] for lane in lanes]
+
+
+def _group_results(mappings: list, outcomes: dict, duration: Optional[float],
+                   started_at: int, completed_at: int) -> list:
+    """One SyncResult per mapping of a group from its (success, message, stats)."""
+    results = []
+    for mapping in mappings:
+        success, message, stats = outcomes[mapping['id']]
+        results.append(SyncResult(
+            mapping['id'], mapping['name'], "success" if success else "error", message,
+            stats['files_transferred'], stats['bytes_transferred'], duration,
+            started_at, completed_at
+        ))
+    return results
+
+
+async def sync_mapping_group(mappings: list, nas_config: dict) -> list:
+    """Sync one group from group_mappings() with a single rsync.
+
+    Returns a SyncResult per mapping, with the files and bytes rsync sent
+    from that mapping's folder. If a coalesced run fails, the error could
+    come from any member, so each is re-run on its own and gets its own
+    status. Nothing is written to the database here; the caller records the
+    results (see record_results).
+    """
+    first = mappings[0]
+    mapping_ids = [m['id'] for m in mappings]
+    name = ", ".join(m['name'] for m in mappings)
+    current_sync_mappings.update(mapping_ids)
+    started_at = int(time.time())
     
-    logger.info(f"Starting sync for mapping '{mapping['name']}': {mapping['source_path']} -> {mapping['destination_path']}")
+    for mapping in mappings:
+        logger.info("Starting sync for mapping '%s': %s -> %s",
+                    mapping['name'], mapping['source_path'], mapping['destination_path'])
     
     try:
-        start_time = datetime.utcnow()
+        # Wall-clock started_at is for display; the duration uses the monotonic
+        # clock so an NTP step during a long rsync can't skew it
+        t0 = time.monotonic()
         
-        success, message, stats = await run_rsync(
-            source=mapping['source_path'],
-            destination=mapping['destination_path'],
+        options = dict(
             ssh_user=nas_config['ssh_user'],
-            hostname=nas_config['hostname'],
+            hostname=nas_config.get('hostname_resolved') or nas_config['hostname'],
             ssh_key_path=nas_config['ssh_key_path'],
             ssh_port=nas_config['ssh_port'],
-            delete_source=bool(mapping['delete_source'])
+            delete_source=bool(first['delete_source']),
+            control_path=nas_config.get('control_path'),
+            ssh_cipher=nas_config.get('ssh_cipher'),
+            compress=bool(nas_config.get('compress')),
+            host_key_alias=_host_key_alias(nas_config)
         )
+        # Probe one mapping at a time and stop at the first change, so a group
+        # holds at most one session on the SSH master at once and the pass
+        # stays within max_parallel sessions (sshd's MaxSessions defaults to 10)
+        unchanged = True
+        for mapping in mappings:
+            if not await tree_unchanged(mapping, nas_config):
+                unchanged = False
+                break
+        if unchanged:
+            logger.info("No changes for mapping(s) %s, skipping rsync", name)
+            nothing = {"files_transferred": 0, "bytes_transferred": 0}
+            outcomes = {m['id']: (True, "Already up to date", nothing) for m in mappings}
+        elif len(mappings) == 1:
+            outcomes = {first['id']: await run_rsync(
+                source=first['source_path'], destination=first['destination_path'], **options
+            )}
+        else:
+            success, message, stats = await run_rsync_multi(
+                [m['source_path'].rstrip('/') for m in mappings],
+                os.path.dirname(first['destination_path'].rstrip('/')).rstrip('/') + '/',
+                **options
+            )
+            per_source = stats.get("per_source") or {}
+            outcomes = {}
+            for mapping in mappings:
+                others = ", ".join(m['name'] for m in mappings if m is not mapping)
+                sent = per_source.get(os.path.basename(mapping['source_path'].rstrip('/')),
+                                      {"files_transferred": 0, "bytes_transferred": 0})
+                outcomes[mapping['id']] = (success, f"{message} (shared run with {others})", sent)
+            if not success:
+                # One at a time, like the probes; what the shared run already
+                # sent is skipped and its counts are kept
+                logger.warning("Shared rsync for %s failed, re-running each mapping on its own", name)
+                for mapping in mappings:
+                    success, message, stats = await run_rsync(
+                        source=mapping['source_path'], destination=mapping['destination_path'],
+                        **options
+                    )
+                    sent = outcomes[mapping['id']][2]
+                    outcomes[mapping['id']] = (success, message, {
+                        key: sent[key] + stats[key]
+                        for key in ("files_transferred", "bytes_transferred")
+                    })
         
-        end_time = datetime.utcnow()
-        duration = (end_time - start_time).total_seconds()
-
-        status = "success" if success else "error"
+        duration = time.monotonic() - t0
 
         # rsync --remove-source-files leaves empty folder husks behind
-        if success and mapping['delete_source']:
-            pruned = prune_empty_dirs(mapping['source_path'])
-            if pruned:
-                logger.info(f"Pruned {pruned} empty directories under {mapping['source_path']}")
-        
-        # Update mapping status
-        await update_mapping_sync_status(mapping_id, status, message)
+        if first['delete_source']:
+            for mapping in mappings:
+                if not outcomes[mapping['id']][0]:
+                    continue
+                pruned = prune_empty_dirs(mapping['source_path'])
+                if pruned:
+                    logger.info("Pruned %d empty directories under %s", pruned, mapping['source_path'])
         
-        # Create sync log
-        await create_sync_log(
-            mapping_id=mapping_id,
-            status=status,
-            message=message,
-            files_transferred=stats['files_transferred'],
-            bytes_transferred=stats['bytes_transferred'],
-            duration_seconds=duration,
-            started_at=started_at
-        )
-        
-        return success
+        return _group_results(mappings, outcomes, duration, started_at, int(time.time()))
         
     except Exception as e:
-        logger.error(f"Error syncing mapping {mapping_id}: {e}")
-        await update_mapping_sync_status(mapping_id, "error", str(e))
-        await create_sync_log(
-            mapping_id=mapping_id,
-            status="error",
-            message=str(e),
-            started_at=started_at
-        )
-        return False
+        logger.error("Error syncing mapping(s) %s: %s", name, e)
+        nothing = {"files_transferred": 0, "bytes_transferred": 0}
+        outcomes = {m['id']: (False, str(e), nothing) for m in mappings}
+        return _group_results(mappings, outcomes, None, started_at, int(time.time()))
     finally:
-        current_sync_mapping = None
+        current_sync_mappings.difference_update(mapping_ids)
+
+
+async def sync_mapping(mapping: dict, nas_config: dict) -> SyncResult:
+    """Sync a single folder mapping (see sync_mapping_group)."""
+    return (await sync_mapping_group([mapping], nas_config))[0]
 
 
 async def run_sync_all():
     """Run sync for all enabled mappings if NAS is online."""
-    global sync_in_progress
-    
-    if sync_in_progress:
+    if _sync_lock.locked():
         logger.info("Sync already in progress, skipping")
         return {"status": "skipped", "reason": "Sync already in progress"}
-    
+    async with _sync_lock:
+        return await _sync_all()
+
+
+async def _sync_all():
     nas_config = await get_nas_config()
     if not nas_config:
         logger.warning("No NAS configuration found")
         return {"status": "error", "reason": "No NAS configuration"}
     
     # Check if NAS is online
-    if not await check_nas_online(nas_config['hostname']):
-        logger.info(f"NAS {nas_config['hostname']} is offline, skipping sync")
+    if not await check_nas_online_cached(nas_config['hostname'], nas_config['ssh_port'],
+                                         method=nas_config.get('online_check') or "tcp"):
+        logger.info("NAS %s is offline, skipping sync", nas_config['hostname'])
         return {"status": "skipped", "reason": "NAS is offline"}
+    nas_config['hostname_resolved'] = await resolve_host(nas_config['hostname'], nas_config['ssh_port'])
     
     mappings = await get_folder_mappings()
     enabled_mappings = [m for m in mappings if m['enabled']]
@@ -308,43 +815,70 @@ async def run_sync_all():
         logger.info("No enabled mappings to sync")
         return {"status": "skipped", "reason": "No enabled mappings"}
     
-    sync_in_progress = True
     results = {"status": "completed", "mappings": [], "any_synced": False}
     
-    try:
-        for mapping in enabled_mappings:
-            success = await sync_mapping(mapping, nas_config)
-            results["mappings"].append({
-                "id": mapping['id'],
-                "name": mapping['name'],
-                "success": success
-            })
-            if success:
-                results["any_synced"] = True
-        
-        # Run post-sync actions if anything was synced
-        if results["any_synced"]:
-            await execute_post_sync_actions()
-            
-    finally:
-        sync_in_progress = False
+    # Sibling folders share one rsync; lanes of groups that don't overlap run
+    # side by side, up to max_parallel rsyncs at once
+    lanes = group_lanes(group_mappings(enabled_mappings))
+    semaphore = asyncio.Semaphore(max(1, nas_config.get('max_parallel') or 4))
+
+    async def sync_lane(lane):
+        outcomes = []
+        for group in lane:
+            async with semaphore:
+                try:
+                    outcomes.append((group, await sync_mapping_group(group, nas_config)))
+                except Exception as e:
+                    outcomes.append((group, e))
+        return outcomes
+
+    async with ssh_master(nas_config) as control_path:
+        nas_config['control_path'] = control_path
+        lane_outcomes = await asyncio.gather(*(sync_lane(lane) for lane in lanes))
+
+    sync_results = []
+    for group, outcome in (o for outcomes in lane_outcomes for o in outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Sync of mapping(s) %s failed: %r", [m['id'] for m in group], outcome)
+            outcome = [SyncResult(m['id'], m['name'], "error", repr(outcome),
+                                  completed_at=int(time.time())) for m in group]
+        sync_results.extend(outcome)
+    names = {m['id']: m['name'] for m in enabled_mappings}
+    for result in sync_results:
+        results["mappings"].append({
+            "id": result.mapping_id,
+            "name": names[result.mapping_id],
+            "success": result.success
+        })
+        if result.success:
+            results["any_synced"] = True
+
+    # One transaction for the whole pass instead of two per mapping
+    await record_results(sync_results)
+    
+    # Run post-sync actions if anything was synced
+    if results["any_synced"]:
+        await execute_post_sync_actions()
     
     return results
 
 
 async def run_sync_single(mapping_id: int):
     """Run sync for a single mapping."""
-    global sync_in_progress
-    
-    if sync_in_progress:
+    if _sync_lock.locked():
         return {"status": "error", "reason": "Sync already in progress"}
-    
+    async with _sync_lock:
+        return await _sync_single(mapping_id)
+
+
+async def _sync_single(mapping_id: int):
     nas_config = await get_nas_config()
     if not nas_config:
         return {"status": "error", "reason": "No NAS configuration"}
     
     # Check if NAS is online
-    if not await check_nas_online(nas_config['hostname']):
+    if not await check_nas_online_cached(nas_config['hostname'], nas_config['ssh_port'],
+                                         method=nas_config.get('online_check') or "tcp"):
         return {"status": "error", "reason": "NAS is offline"}
     
     from database import get_folder_mapping
@@ -352,26 +886,25 @@ async def run_sync_single(mapping_id: int):
     if not mapping:
         return {"status": "error", "reason": "Mapping not found"}
     
-    sync_in_progress = True
+    result = await sync_mapping(mapping, nas_config)
+    await record_results([result])
+    success = result.success
     
-    try:
-        success = await sync_mapping(mapping, nas_config)
-        
-        if success:
-            await execute_post_sync_actions()
-        
-        return {
-            "status": "completed" if success else "error",
-            "mapping": mapping['name'],
-            "success": success
-        }
-    finally:
-        sync_in_progress = False
+    if success:
+        await execute_post_sync_actions()
+    
+    return {
+        "status": "completed" if success else "error",
+        "mapping": mapping['name'],
+        "success": success
+    }
 
 
 def get_sync_status():
     """Get current sync status."""
     return {
-        "in_progress": sync_in_progress,
-        "current_mapping": current_sync_mapping
+        "in_progress": _sync_lock.locked(),
+        # current_mapping is kept for older clients; several can now run at once
+        "current_mapping": min(current_sync_mappings, default=None),
+        "current_mappings": sorted(current_sync_mappings)
     }